@@ -1,15 +1,175 @@
 
 
 import json
-from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Any, Optional
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Tuple
 import sys
-import re
-from collections import defaultdict
+from bisect import bisect_left
+from math import ceil, floor
+from operator import itemgetter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+_UTC = timezone.utc
+# Events may be stamped up to 24 hours in the future
+_MAX_FUTURE_DELTA = 86400.0
+# Below this many events per service the scalar loop beats NumPy setup cost
+_VECTORIZE_MIN_EVENTS = 512
+
+
+def _format_utc(epoch_second: int) -> str:
+    # Same output as strftime("%Y-%m-%dT%H:%M:%SZ") without parsing a
+    # format string; UTC isoformat always ends in +00:00
+    return datetime.fromtimestamp(epoch_second, tz=_UTC).isoformat(timespec='seconds')[:-6] + 'Z'
+
+
+def _trailing_alerts(current_expected: float, consecutive_misses: int,
+                     interval: float, tolerance: float, allowed_misses: int,
+                     now_epoch: float) -> List[float]:
+    alerts = []
+    
+    while consecutive_misses < allowed_misses:
+        current_expected += interval
+        
+        if now_epoch - current_expected > tolerance:
+            consecutive_misses += 1
+            if consecutive_misses >= allowed_misses:
+                alerts.append(current_expected)
+                consecutive_misses = 0
+        else:
+            break
+    
+    return alerts
+
+
+def _bisect_left(values, target: float, lo: int) -> int:
+    # Numba cannot call into the bisect module, so the compiled kernel
+    # uses this copy; plain Python uses bisect.bisect_left instead
+    hi = len(values)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if values[mid] < target:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _detect_missed(epochs, interval: float, tolerance: float, allowed_misses: int,
+                   gap_limit: float, now_epoch: float) -> List[float]:
+    alerts = []
+    consecutive_misses = 0
+    max_gap = interval * gap_limit
+    event_count = len(epochs)
+    
+    current_expected = epochs[0]
+    event_index = 1
+    
+    while event_index <= event_count:
+        next_expected = current_expected + interval
+        
+        gap_seconds = next_expected - current_expected
+        
+        if gap_seconds > max_gap:
+            if event_index < event_count:
+                current_expected = epochs[event_index]
+                consecutive_misses = 0
+                event_index += 1
+                continue
+        
+        found_heartbeat = False
+        current_expected = next_expected
+        
+        # Jump past events that arrived too early for this slot
+        event_index = _bisect_left(epochs, current_expected - tolerance, event_index)
+        
+        if event_index < event_count and epochs[event_index] - current_expected <= tolerance:
+            found_heartbeat = True
+            consecutive_misses = 0
+            current_expected = epochs[event_index]
+            event_index += 1
+        
+        if not found_heartbeat:
+            consecutive_misses += 1
+            
+            if consecutive_misses >= allowed_misses:
+                alerts.append(current_expected)
+                consecutive_misses = 0
+        
+        if event_index >= event_count:
+            if now_epoch - epochs[-1] < max_gap:
+                alerts.extend(_trailing_alerts(current_expected, consecutive_misses,
+                                               interval, tolerance,
+                                               allowed_misses, now_epoch))
+            break
+    
+    return alerts
+
+
+# Compile the scalar kernels to native code when Numba is available;
+# otherwise they run as plain Python
+if njit is not None:
+    _bisect_left = njit(cache=True)(_bisect_left)
+    _trailing_alerts = njit(cache=True)(_trailing_alerts)
+    _detect_missed = njit(cache=True)(_detect_missed)
+else:
+    _bisect_left = bisect_left
+
+
+def _detect_missed_vectorized(epochs: List[float], interval: float, tolerance: float,
+                              allowed_misses: int, max_gap: float,
+                              now_epoch: float) -> Optional[List[float]]:
+    arr = np.asarray(epochs, dtype=np.float64)
+    gaps = np.diff(arr)
+    
+    # Number of expected intervals until each event lands inside a tolerance
+    # window. If any event falls between windows the scalar loop would skip
+    # it rather than re-anchor on it, so leave those inputs to that loop.
+    steps = np.maximum(np.ceil((gaps - tolerance) / interval), 1.0)
+    expected = steps * interval
+    if not np.all((gaps >= expected - tolerance) & (gaps <= expected + tolerance)):
+        return None
+    
+    # Misses reset at every heartbeat, so each gap alerts once per
+    # allowed_misses missed intervals, measured from the preceding event.
+    # The miss counter is an integer, so a fractional allowed_misses
+    # behaves like the next whole number.
+    misses_per_alert = ceil(allowed_misses)
+    counts = ((steps - 1) // misses_per_alert).astype(np.int64)
+    total = int(counts.sum())
+    
+    alerts = []
+    if total:
+        anchors = np.repeat(arr[:-1], counts)
+        offsets = np.arange(1, total + 1) - np.repeat(np.cumsum(counts) - counts, counts)
+        alerts = (anchors + offsets * (misses_per_alert * interval)).tolist()
+    
+    if now_epoch - arr[-1] < max_gap:
+        alerts.extend(_trailing_alerts(float(arr[-1]), 0, interval, tolerance,
+                                       allowed_misses, now_epoch))
+    
+    return alerts
 
 
 class HeartbeatMonitor:
     
+    # 2**17 parsed timestamps before the cache is flushed
+    _TS_CACHE_SIZE = 131072
+    
     def __init__(self, interval_seconds: int, allowed_misses: int, 
                  tolerance: float = 0.1, future_limit: int = 300,
                  gap_limit: int = 10):
@@ -34,204 +194,199 @@ class HeartbeatMonitor:
         self.future_limit = future_limit
         self.gap_limit = gap_limit
         self.tolerance_seconds = interval_seconds * tolerance
+        self._ts_cache: Dict[str, datetime] = {}
     
     def parse_timestamp(self, timestamp_str: str) -> Optional[datetime]:
-        if not isinstance(timestamp_str, str) or not timestamp_str.strip():
+        if not isinstance(timestamp_str, str):
             return None
-            
+        
+        # Keyed on the raw string so cache hits skip the strip below
+        cached = self._ts_cache.get(timestamp_str)
+        if cached is not None:
+            return cached
+        
+        raw_str = timestamp_str
         timestamp_str = timestamp_str.strip()
+        if not timestamp_str:
+            return None
         
         try:
-            dt = None
-            
+            # fromisoformat handles offset and naive forms directly; only
+            # the trailing 'Z' needs rewriting before Python 3.11
             if timestamp_str.endswith('Z'):
-                dt = datetime.fromisoformat(timestamp_str[:-1] + '+00:00')
-            
-            elif re.match(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d+)?[+-]\d{2}:\d{2}$', timestamp_str):
-                dt = datetime.fromisoformat(timestamp_str)
-            
-            elif re.match(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d+)?$', timestamp_str):
-                dt = datetime.fromisoformat(timestamp_str + '+00:00')
-            
-            else:
-                dt = datetime.fromisoformat(timestamp_str)
+                timestamp_str = timestamp_str[:-1] + '+00:00'
+            dt = datetime.fromisoformat(timestamp_str)
             
             if dt.tzinfo is None:
-                dt = dt.replace(tzinfo=timezone.utc)
+                dt = dt.replace(tzinfo=_UTC)
             else:
-                dt = dt.astimezone(timezone.utc)
+                dt = dt.astimezone(_UTC)
+            
+            if len(self._ts_cache) >= self._TS_CACHE_SIZE:
+                self._ts_cache.clear()
+            self._ts_cache[raw_str] = dt
             
             return dt
             
         except (ValueError, AttributeError, TypeError):
             return None
     
-    def validate_event(self, event: Dict[str, Any]) -> bool:
+    def validate_event(self, event: Dict[str, Any], now_epoch: Optional[float] = None) -> bool:
+        return self._normalize_event(event, now_epoch) is not None
+    
+    def _normalize_event(self, event: Dict[str, Any],
+                         now_epoch: Optional[float] = None) -> Optional[Tuple[str, float]]:
+        # Returns the interned service name and epoch of a valid event so
+        # callers don't have to look them up again
         if not isinstance(event, dict):
-            return False
-            
-        if 'service' not in event or 'timestamp' not in event:
-            return False
-            
-        service = event['service']
-        if not isinstance(service, str) or not service.strip():
-            return False
-            
-        if len(service.strip()) > 100:
-            return False
+            return None
+        
+        service = event.get('service')
+        timestamp_str = event.get('timestamp')
+        if not service or not timestamp_str or not isinstance(service, str):
+            return None
+        
+        service = service.strip()
+        if not service or len(service) > 100:
+            return None
             
-        timestamp = self.parse_timestamp(event['timestamp'])
+        timestamp = self.parse_timestamp(timestamp_str)
         if timestamp is None:
-            return False
+            return None
             
-        # Allow timestamps up to 24 hours in future
-        now = datetime.now(timezone.utc)
-        max_future = now + timedelta(hours=24)
-        if timestamp > max_future:
-            return False
+        if now_epoch is None:
+            now_epoch = datetime.now(_UTC).timestamp()
+        epoch = timestamp.timestamp()
+        if epoch > now_epoch + _MAX_FUTURE_DELTA:
+            return None
             
-        return True
+        return sys.intern(service), epoch
     
     def sort_events_by_service(self, events: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
-        services = defaultdict(list)
+        services, _ = self._group_events(events)
+        return {
+            service_name: [event for _, event in service_events]
+            for service_name, service_events in services.items()
+        }
+    
+    def _group_events(self, events: List[Dict[str, Any]]) -> Tuple[Dict[str, List[Tuple[float, Dict[str, Any]]]], int]:
+        # Events are kept as (epoch, event) pairs so the caller's dicts are
+        # never modified
+        services = {}
         malformed_count = 0
+        now_epoch = datetime.now(_UTC).timestamp()
         
         for event in events:
-            if not self.validate_event(event):
+            normalized = self._normalize_event(event, now_epoch)
+            if normalized is None:
                 print(f"Skipping malformed event: {event}", file=sys.stderr)
                 malformed_count += 1
                 continue
                 
-            service_name = event['service'].strip()
-            services[service_name].append(event)
+            service_name, epoch = normalized
+            services.setdefault(service_name, []).append((epoch, event))
         
-        # Sort and deduplicate
-        for service_name in services:
-            services[service_name].sort(
-                key=lambda x: self.parse_timestamp(x['timestamp'])
-            )
+        # Sort, then drop duplicates by comparing adjacent epochs
+        for service_name, service_events in services.items():
+            service_events.sort(key=itemgetter(0))
             
-            # Remove duplicates
-            unique_events = []
-            seen_timestamps = set()
+            unique_events = [service_events[0]]
+            previous_epoch = service_events[0][0]
             
-            for event in services[service_name]:
-                timestamp = self.parse_timestamp(event['timestamp'])
-                timestamp_key = timestamp.isoformat()
-                
-                if timestamp_key not in seen_timestamps:
-                    seen_timestamps.add(timestamp_key)
-                    unique_events.append(event)
+            for epoch, event in service_events[1:]:
+                if epoch != previous_epoch:
+                    unique_events.append((epoch, event))
+                    previous_epoch = epoch
                 else:
-                    print(f"Skipping duplicate event for service '{service_name}' at {timestamp_key}", file=sys.stderr)
+                    print(f"Skipping duplicate event for service '{service_name}' at {datetime.fromtimestamp(epoch, tz=_UTC).isoformat()}", file=sys.stderr)
             
             services[service_name] = unique_events
         
         if malformed_count > 0:
             print(f"Processed {len(events)} events, skipped {malformed_count} malformed events", file=sys.stderr)
         
-        return dict(services)
+        return services, malformed_count
     
     def detect_missed_heartbeats(self, service_events: List[Dict[str, Any]]) -> List[datetime]:
-        if not service_events:
+        epochs = [self.parse_timestamp(event['timestamp']).timestamp() for event in service_events]
+        return [datetime.fromtimestamp(alert, tz=_UTC)
+                for alert in self._detect_missed_epochs(epochs)]
+    
+    def _detect_missed_epochs(self, epochs: List[float]) -> List[float]:
+        if not epochs:
             return []
         
-        alerts = []
-        consecutive_misses = 0
+        interval = float(self.interval_seconds)
+        tolerance = float(self.tolerance_seconds)
+        gap_limit = float(self.gap_limit)
+        now_epoch = datetime.now(_UTC).timestamp()
         
-        first_event_time = self.parse_timestamp(service_events[0]['timestamp'])
-        current_expected = first_event_time
-        event_index = 1
+        alerts = None
+        if njit is not None:
+            alerts = _detect_missed(np.asarray(epochs, dtype=np.float64), interval,
+                                    tolerance, self.allowed_misses, gap_limit, now_epoch)
+        # A gap_limit below 1 re-anchors on every event, which only the
+        # scalar kernel models
+        elif np is not None and len(epochs) >= _VECTORIZE_MIN_EVENTS and gap_limit >= 1:
+            alerts = _detect_missed_vectorized(epochs, interval, tolerance,
+                                               self.allowed_misses,
+                                               interval * gap_limit, now_epoch)
         
-        while event_index <= len(service_events):
-            next_expected = current_expected + timedelta(seconds=self.interval_seconds)
-            
-            gap_seconds = (next_expected - current_expected).total_seconds()
-            max_gap = self.interval_seconds * self.gap_limit
-            
-            if gap_seconds > max_gap:
-                if event_index < len(service_events):
-                    current_expected = self.parse_timestamp(service_events[event_index]['timestamp'])
-                    consecutive_misses = 0
-                    event_index += 1
-                    continue
-            
-            found_heartbeat = False
-            current_expected = next_expected
-            
-            while event_index < len(service_events):
-                event_time = self.parse_timestamp(service_events[event_index]['timestamp'])
-                time_diff = (event_time - current_expected).total_seconds()
-                
-                if abs(time_diff) <= self.tolerance_seconds:
-                    found_heartbeat = True
-                    consecutive_misses = 0
-                    event_index += 1
-                    current_expected = event_time
-                    break
-                elif time_diff > self.tolerance_seconds:
-                    break
-                else:
-                    event_index += 1
-            
-            if not found_heartbeat:
-                consecutive_misses += 1
-                
-                if consecutive_misses >= self.allowed_misses:
-                    alerts.append(current_expected)
-                    consecutive_misses = 0
-            
-            if event_index >= len(service_events):
-                last_event_time = self.parse_timestamp(service_events[-1]['timestamp'])
-                time_since_last = (datetime.now(timezone.utc) - last_event_time).total_seconds()
-                
-                if time_since_last < self.interval_seconds * self.gap_limit:
-                    while consecutive_misses < self.allowed_misses:
-                        current_expected += timedelta(seconds=self.interval_seconds)
-                        time_since_expected = (datetime.now(timezone.utc) - current_expected).total_seconds()
-                        
-                        if time_since_expected > self.tolerance_seconds:
-                            consecutive_misses += 1
-                            if consecutive_misses >= self.allowed_misses:
-                                alerts.append(current_expected)
-                                consecutive_misses = 0
-                        else:
-                            break
-                break
+        if alerts is None:
+            alerts = _detect_missed(epochs, interval, tolerance,
+                                    self.allowed_misses, gap_limit, now_epoch)
         
         return alerts
     
-    def monitor_heartbeats(self, events: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    def analyze(self, events: List[Dict[str, Any]]) -> Dict[str, Any]:
         if not isinstance(events, list):
             print("Error: events must be a list", file=sys.stderr)
-            return []
+            return {'alerts': [], 'service_stats': {}, 'malformed_count': 0}
         
-        services_events = self.sort_events_by_service(events)
+        services_events, malformed_count = self._group_events(events)
         all_alerts = []
+        all_alerts_extend = all_alerts.extend
+        service_stats = {}
         
         for service_name, service_events in services_events.items():
-            alert_times = self.detect_missed_heartbeats(service_events)
+            alert_epochs = self._detect_missed_epochs([epoch for epoch, _ in service_events])
+            service_stats[service_name] = {
+                'totalEvents': len(service_events),
+                'alerts': len(alert_epochs)
+            }
             
-            for alert_time in alert_times:
-                all_alerts.append({
-                    "service": service_name,
-                    "alert_at": alert_time.strftime("%Y-%m-%dT%H:%M:%SZ")
-                })
+            # Whole seconds order alerts exactly as their formatted
+            # alert_at strings would
+            all_alerts_extend((floor(alert_epoch), service_name) for alert_epoch in alert_epochs)
         
-        all_alerts.sort(key=lambda x: x["alert_at"])
-        return all_alerts
+        all_alerts.sort(key=itemgetter(0))
+        return {
+            'alerts': [{
+                "service": service_name,
+                "alert_at": _format_utc(alert_second)
+            } for alert_second, service_name in all_alerts],
+            'service_stats': service_stats,
+            'malformed_count': malformed_count
+        }
+    
+    def monitor_heartbeats(self, events: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        return self.analyze(events)['alerts']
 
 
 def load_events_from_file(filename: str) -> List[Dict[str, Any]]:
     try:
-        with open(filename, 'r', encoding='utf-8') as file:
-            data = json.load(file)
+        if orjson is not None:
+            with open(filename, 'rb') as file:
+                data = orjson.loads(file.read())
+        else:
+            with open(filename, 'r', encoding='utf-8') as file:
+                data = json.load(file)
             
-            if not isinstance(data, list):
-                print(f"Error: File {filename} does not contain a JSON array", file=sys.stderr)
-                return []
-                
-            return data
+        if not isinstance(data, list):
+            print(f"Error: File {filename} does not contain a JSON array", file=sys.stderr)
+            return []
+            
+        return data
             
     except FileNotFoundError:
         print(f"Error loading file {filename}: File not found", file=sys.stderr)
@@ -3,6 +3,8 @@ import unittest
 import tempfile
 import json
 import os
+from datetime import datetime, timedelta, timezone
+import main
 from main import HeartbeatMonitor, load_events_from_file
 
 
@@ -67,6 +69,39 @@ class TestHeartbeatMonitor(unittest.TestCase):
         
         self.assertEqual(len(alerts), 0)
 
+    def test_analyze(self):
+        events = [
+            {"service": "email", "timestamp": "2025-08-04T10:00:00Z"},
+            {"service": "email", "timestamp": "2025-08-04T10:06:00Z"},
+            {"service": "api", "timestamp": "2025-08-04T10:00:00Z"},
+            {"service": "api", "timestamp": "2025-08-04T10:00:00Z"},
+            {"service": "broken"},
+        ]
+        
+        monitor = HeartbeatMonitor(60, 3)
+        result = monitor.analyze(events)
+        
+        self.assertEqual(result["alerts"], monitor.monitor_heartbeats(events))
+        self.assertEqual(result["malformed_count"], 1)
+        self.assertEqual(result["service_stats"], {
+            "email": {"totalEvents": 2, "alerts": 1},
+            "api": {"totalEvents": 1, "alerts": 0},
+        })
+
+    def test_events_not_modified(self):
+        events = [
+            {"service": "email", "timestamp": "2025-08-04T10:00:00Z"},
+            {"service": "email", "timestamp": "2025-08-04T10:00:00Z"},
+            {"service": "email", "timestamp": "2025-08-04T10:06:00Z"},
+        ]
+        original = json.dumps(events)
+        
+        monitor = HeartbeatMonitor(60, 3)
+        monitor.monitor_heartbeats(events)
+        monitor.sort_events_by_service(events)
+        
+        self.assertEqual(json.dumps(events), original)
+
     def test_parse_timestamp_valid(self):
         monitor = HeartbeatMonitor(60, 3)
         
@@ -99,6 +134,16 @@ class TestHeartbeatMonitor(unittest.TestCase):
             parsed = monitor.parse_timestamp(ts)
             self.assertIsNone(parsed)
 
+    def test_parse_timestamp_cached(self):
+        monitor = HeartbeatMonitor(60, 3)
+        
+        first = monitor.parse_timestamp(" 2025-08-04T10:00:00Z ")
+        second = monitor.parse_timestamp(" 2025-08-04T10:00:00Z ")
+        
+        self.assertIs(first, second)
+        self.assertIsNone(monitor.parse_timestamp("not-a-timestamp"))
+        self.assertIsNone(monitor.parse_timestamp("   "))
+
     def test_validate_event_valid(self):
         
         monitor = HeartbeatMonitor(60, 3)
@@ -155,6 +200,18 @@ class TestHeartbeatMonitor(unittest.TestCase):
         
         self.assertIsInstance(alerts, list)
 
+    def test_large_input(self):
+        start = datetime(2025, 8, 4, 10, 0, 0, tzinfo=timezone.utc)
+        events = [
+            {"service": "bulk", "timestamp": (start + timedelta(minutes=i)).strftime("%Y-%m-%dT%H:%M:%SZ")}
+            for i in range(600) if not 300 < i < 306
+        ]
+        
+        monitor = HeartbeatMonitor(60, 3)
+        alerts = monitor.monitor_heartbeats(events)
+        
+        self.assertEqual(alerts, [{"service": "bulk", "alert_at": "2025-08-04T15:03:00Z"}])
+
     def test_parameter_validation(self):
         
        
@@ -248,5 +305,83 @@ class TestHeartbeatMonitor(unittest.TestCase):
         print("Created heartbeat_events.json with sample data")
 
 
+
+@unittest.skipIf(main.np is None, "numpy not installed")
+class TestVectorizedDetection(unittest.TestCase):
+    
+    START = 1754301600.0
+    
+    def detect_both(self, epochs, now_epoch):
+        vectorized = main._detect_missed_vectorized(epochs, 60.0, 6.0, 3, 600.0, now_epoch)
+        scalar = main._detect_missed(main.np.asarray(epochs, dtype=main.np.float64),
+                                     60.0, 6.0, 3, 10.0, now_epoch)
+        return vectorized, list(scalar)
+
+    def test_regular_series_with_gaps(self):
+        epochs = [self.START + 60 * i for i in range(40) if i not in (5, 6, 7, 8, 20, 21, 22, 23, 24, 25, 26)]
+        
+        vectorized, scalar = self.detect_both(epochs, epochs[-1] + 86400)
+        
+        self.assertEqual(len(vectorized), 3)
+        self.assertEqual(vectorized, scalar)
+
+    def test_jitter_within_tolerance(self):
+        offsets = [0, 2, -1, 3, 0, -2]
+        epochs = [self.START + 60 * i + offsets[i % len(offsets)] for i in range(30) if not 10 < i < 15]
+        
+        vectorized, scalar = self.detect_both(epochs, epochs[-1] + 86400)
+        
+        self.assertEqual(len(vectorized), 1)
+        self.assertEqual(vectorized, scalar)
+
+    def test_fractional_allowed_misses(self):
+        epochs = [self.START + 60 * i for i in range(600) if not 100 < i < 106]
+        now_epoch = epochs[-1] + 86400
+        
+        vectorized = main._detect_missed_vectorized(epochs, 60.0, 6.0, 2.5, 600.0, now_epoch)
+        scalar = main._detect_missed(main.np.asarray(epochs, dtype=main.np.float64),
+                                     60.0, 6.0, 2.5, 10.0, now_epoch)
+        
+        self.assertEqual(vectorized, [self.START + 60 * 103])
+        self.assertEqual(vectorized, list(scalar))
+
+    def test_event_between_windows(self):
+        epochs = [self.START, self.START + 60, self.START + 90, self.START + 180]
+        
+        vectorized = main._detect_missed_vectorized(epochs, 60.0, 6.0, 3, 600.0, epochs[-1] + 86400)
+        
+        self.assertIsNone(vectorized)
+
+    def test_trailing_alerts(self):
+        epochs = [self.START + 60 * i for i in range(10)]
+        
+        vectorized, scalar = self.detect_both(epochs, epochs[-1] + 400)
+        
+        self.assertEqual(vectorized, [epochs[-1] + 180, epochs[-1] + 360])
+        self.assertEqual(vectorized, scalar)
+
+
+
+@unittest.skipIf(main.njit is None, "numba not installed")
+class TestCompiledDetection(unittest.TestCase):
+
+    def test_compiled_matches_python(self):
+        start = 1754301600.0
+        offsets = [0, 60, 120, 190, 200, 420, 481, 543.5, 600, 1500, 1560, 1562, 1620]
+        epochs = [start + offset for offset in offsets]
+        
+        for tolerance, allowed_misses, gap_limit, now_epoch in [
+            (6.0, 3, 10.0, epochs[-1] + 86400),
+            (6.0, 1, 10.0, epochs[-1] + 500),
+            (30.0, 2, 10.0, epochs[-1] + 300),
+            (60.0, 3, 0.5, epochs[-1] + 86400),
+        ]:
+            args = (60.0, tolerance, allowed_misses, gap_limit, now_epoch)
+            compiled = main._detect_missed(main.np.asarray(epochs, dtype=main.np.float64), *args)
+            python = main._detect_missed.py_func(epochs, *args)
+            
+            self.assertEqual(list(compiled), python)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,92 @@
+import unittest
+import io
+import json
+from unittest import mock
+
+try:
+    import web_server
+except ImportError:
+    web_server = None
+
+
+SAMPLE_EVENTS = [
+    {"service": "email", "timestamp": "2025-08-04T10:00:00Z"},
+    {"service": "email", "timestamp": "2025-08-04T10:01:00Z"},
+    {"service": "email", "timestamp": "2025-08-04T10:06:00Z"},
+    {"service": "api", "timestamp": "2025-08-04T10:00:00Z"},
+    {"service": "broken"},
+]
+
+
+@unittest.skipIf(web_server is None, "flask not installed")
+class TestUploadApi(unittest.TestCase):
+
+    def setUp(self):
+        self.client = web_server.app.test_client()
+        with web_server.upload_cache_lock:
+            web_server.upload_cache.clear()
+
+    def upload(self, events):
+        return self.client.post(
+            '/api/upload',
+            data={'file': (io.BytesIO(json.dumps(events).encode('utf-8')), 'events.json')},
+            content_type='multipart/form-data'
+        )
+
+    def test_upload_returns_receipt(self):
+        response = self.upload(SAMPLE_EVENTS)
+        data = response.get_json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['eventCount'], len(SAMPLE_EVENTS))
+        self.assertIsInstance(data['uploadId'], str)
+        self.assertNotIn('events', data)
+
+    def test_process_upload_matches_inline_events(self):
+        upload_id = self.upload(SAMPLE_EVENTS).get_json()['uploadId']
+
+        by_id = self.client.post('/api/process', json={'uploadId': upload_id})
+        inline = self.client.post('/api/process', json={'events': SAMPLE_EVENTS})
+
+        self.assertEqual(by_id.status_code, 200)
+        self.assertEqual(by_id.get_json(), inline.get_json())
+
+    def test_process_unknown_upload(self):
+        for upload_id in ['missing', ['not', 'a', 'string'], 123]:
+            response = self.client.post('/api/process', json={'uploadId': upload_id})
+            self.assertEqual(response.status_code, 404)
+
+    def test_upload_cache_eviction(self):
+        first_id = self.upload(SAMPLE_EVENTS).get_json()['uploadId']
+
+        for _ in range(web_server.UPLOAD_CACHE_SIZE):
+            self.upload([])
+
+        self.assertEqual(len(web_server.upload_cache), web_server.UPLOAD_CACHE_SIZE)
+        response = self.client.post('/api/process', json={'uploadId': first_id})
+        self.assertEqual(response.status_code, 404)
+
+
+    def test_upload_cache_event_limit(self):
+        with mock.patch.object(web_server, 'UPLOAD_CACHE_MAX_EVENTS', 8):
+            first_id = self.upload(SAMPLE_EVENTS).get_json()['uploadId']
+            second_id = self.upload(SAMPLE_EVENTS).get_json()['uploadId']
+
+            self.assertEqual(self.client.post('/api/process', json={'uploadId': first_id}).status_code, 404)
+            self.assertEqual(self.client.post('/api/process', json={'uploadId': second_id}).status_code, 200)
+
+            response = self.upload(SAMPLE_EVENTS * 2)
+            self.assertEqual(response.status_code, 413)
+
+    def test_upload_cache_expiry(self):
+        upload_id = self.upload(SAMPLE_EVENTS).get_json()['uploadId']
+
+        with mock.patch.object(web_server, 'UPLOAD_CACHE_TTL', -1):
+            response = self.client.post('/api/process', json={'uploadId': upload_id})
+
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn(upload_id, web_server.upload_cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
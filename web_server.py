@@ -1,13 +1,57 @@
 from flask import Flask, render_template_string, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
+import io
 import json
 import os
+import threading
+import time
+import uuid
+from functools import lru_cache
 from main import HeartbeatMonitor
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    
+    def dumps(self, obj, **kwargs):
+        # Datetimes go through Flask's default handler so responses keep
+        # the same format as the stdlib provider
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
+if orjson is not None:
+    app.json = OrjsonProvider(app)
+# Key order carries no meaning for API clients, so skip sorting responses
+app.json.sort_keys = False
+# Caps the raw request body; parsed events take several times more memory
+app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
 CORS(app)
 
+# Parsed uploads kept server-side so /api/process can reference them by id.
+# Entries expire after UPLOAD_CACHE_TTL seconds, and the oldest are evicted
+# once either the entry or the total event limit is exceeded.
+UPLOAD_CACHE_SIZE = 8
+UPLOAD_CACHE_MAX_EVENTS = 200000
+UPLOAD_CACHE_TTL = 600
+upload_cache = {}
+upload_cache_lock = threading.Lock()
+
 def get_html_template():
     try:
         with open('heartbeat_ui.html', 'r', encoding='utf-8') as f:
@@ -26,6 +70,46 @@ def get_html_template():
         </html>
         """
 
+def cache_upload(events):
+    if len(events) > UPLOAD_CACHE_MAX_EVENTS:
+        return None
+    
+    upload_id = uuid.uuid4().hex
+    now = time.monotonic()
+    with upload_cache_lock:
+        upload_cache[upload_id] = (now, events)
+        total_events = sum(len(cached) for _, cached in upload_cache.values())
+        
+        # Insertion order is upload order, so the first entry is the oldest
+        while upload_cache:
+            oldest_id = next(iter(upload_cache))
+            stored_at, oldest_events = upload_cache[oldest_id]
+            if (now - stored_at <= UPLOAD_CACHE_TTL
+                    and len(upload_cache) <= UPLOAD_CACHE_SIZE
+                    and total_events <= UPLOAD_CACHE_MAX_EVENTS):
+                break
+            del upload_cache[oldest_id]
+            total_events -= len(oldest_events)
+    return upload_id
+
+def get_cached_upload(upload_id):
+    if not isinstance(upload_id, str):
+        return None
+    with upload_cache_lock:
+        entry = upload_cache.get(upload_id)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > UPLOAD_CACHE_TTL:
+            del upload_cache[upload_id]
+            return None
+        return entry[1]
+
+@lru_cache(maxsize=8)
+def get_monitor(interval, allowed_misses):
+    # Reusing monitors keeps their parsed-timestamp caches warm across
+    # requests; analyze() keeps no other per-call state on the instance
+    return HeartbeatMonitor(interval, allowed_misses)
+
 @app.route('/')
 def index():
     return get_html_template()
@@ -35,10 +119,16 @@ def process_heartbeats():
     try:
         data = request.get_json()
         
-        if not data or 'events' not in data:
+        if not data or ('events' not in data and 'uploadId' not in data):
             return jsonify({'error': 'No events provided'}), 400
         
-        events = data['events']
+        if 'uploadId' in data:
+            events = get_cached_upload(data['uploadId'])
+            if events is None:
+                return jsonify({'error': 'Upload not found or expired'}), 404
+        else:
+            events = data['events']
+        
         interval = data.get('expectedInterval', 60)
         allowed_misses = data.get('allowedMisses', 3)
         page = data.get('page', 1)
@@ -55,23 +145,10 @@ def process_heartbeats():
         if page < 1 or page_size < 1:
             return jsonify({'error': 'Invalid pagination parameters'}), 400
         
-        monitor = HeartbeatMonitor(interval, allowed_misses)
-        all_alerts = monitor.monitor_heartbeats(events)
-        
-        services_events = monitor.sort_events_by_service(events)
-        service_stats = {}
-        malformed_count = 0
-        
-        for service_name, service_events in services_events.items():
-            service_alerts = monitor.detect_missed_heartbeats(service_events)
-            service_stats[service_name] = {
-                'totalEvents': len(service_events),
-                'alerts': len(service_alerts)
-            }
-        
-        for event in events:
-            if not monitor.validate_event(event):
-                malformed_count += 1
+        monitor = get_monitor(interval, allowed_misses)
+        analysis = monitor.analyze(events)
+        all_alerts = analysis['alerts']
+        service_stats = analysis['service_stats']
         
         total_alerts = len(all_alerts)
         start_idx = (page - 1) * page_size
@@ -89,13 +166,15 @@ def process_heartbeats():
                 'hasPrevious': page > 1
             },
             'serviceStats': service_stats,
-            'malformedCount': malformed_count,
-            'totalServices': len(services_events),
+            'malformedCount': analysis['malformed_count'],
+            'totalServices': len(service_stats),
             'totalEvents': len(events)
         }
         
         return jsonify(response)
         
+    except RequestEntityTooLarge:
+        return jsonify({'error': 'Request too large'}), 413
     except Exception as e:
         return jsonify({'error': f'Processing failed: {str(e)}'}), 500
 
@@ -154,18 +233,30 @@ def upload_file():
         if not file.filename.endswith('.json'):
             return jsonify({'error': 'File must be a JSON file'}), 400
         
-        content = file.read().decode('utf-8')
-        events = json.loads(content)
+        if orjson is not None:
+            events = orjson.loads(file.stream.read())
+        else:
+            # Decode while parsing rather than holding the raw bytes and the
+            # decoded string in memory at the same time
+            events = json.load(io.TextIOWrapper(file.stream, encoding='utf-8'))
         
         if not isinstance(events, list):
             return jsonify({'error': 'JSON must contain an array of events'}), 400
         
+        upload_id = cache_upload(events)
+        if upload_id is None:
+            return jsonify({'error': f'File cannot contain more than {UPLOAD_CACHE_MAX_EVENTS} events'}), 413
+        
+        # Return a receipt rather than echoing the events back; clients
+        # pass the uploadId to /api/process
         return jsonify({
             'message': f'File uploaded successfully',
-            'events': events,
+            'uploadId': upload_id,
             'eventCount': len(events)
         })
         
+    except RequestEntityTooLarge:
+        return jsonify({'error': 'File too large'}), 413
     except json.JSONDecodeError:
         return jsonify({'error': 'Invalid JSON format'}), 400
     except Exception as e:
@@ -213,7 +304,7 @@ def main():
     print("   - POST /api/process - Process events with pagination")
     print("   - POST /api/reset - Reset data")
     print("   - GET /api/alerts - Get paginated alerts")
-    print("   - POST /api/upload - Upload JSON file")
+    print("   - POST /api/upload - Upload JSON file (returns an uploadId for /api/process)")
     print("   - GET /api/sample-data - Get sample data")
     print("\n Features:")
     print("   -  Pagination (10, 25, 50, 100 alerts per page)")
@@ -230,7 +321,16 @@ def main():
         print("  Warning: main.py not found!")
     
     try:
-        app.run(debug=True, host='0.0.0.0', port=5000)
+        if os.environ.get('FLASK_ENV') == 'development':
+            app.run(debug=True, host='0.0.0.0', port=5000)
+        else:
+            try:
+                from waitress import serve
+            except ImportError:
+                print("  waitress not installed, falling back to the Flask server")
+                app.run(host='0.0.0.0', port=5000)
+            else:
+                serve(app, host='0.0.0.0', port=5000, threads=8)
     except KeyboardInterrupt:
         print("\n Server stopped. Goodbye!")
     except Exception as e: